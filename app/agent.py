@@ -23,18 +23,25 @@ Last Modified: January 2026
 
 from __future__ import annotations
 
+import asyncio
+import atexit
+import json
 import os
 from typing import List
 
+import httpx
 from dotenv import load_dotenv
 
 from langchain_openai import ChatOpenAI
 from langchain_core.tools import StructuredTool
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from langchain_core.runnables import RunnableConfig
 
 # Correct imports using langchain-classic
 from langchain_classic.agents import AgentExecutor, create_tool_calling_agent
 
+from app.state import STATE
+
 # ---- Tool functions (pure Python) ----
 from app.tools.dataframe import (
     dataset_summary,
@@ -48,6 +55,7 @@ from app.tools.stats import (
     correlation_matrix,
 )
 from app.tools.visualization import plot
+from app.tools.cache import tool_cache
 
 # -----------------------------------------------------------------------------
 # Environment / OpenRouter configuration
@@ -61,11 +69,44 @@ OPENROUTER_MODEL = os.getenv(
     "OPENROUTER_MODEL",
     "openai/gpt-4o-mini"  # safe default; change freely
 )
+# Upper bound on parallel sub-calls (e.g. tool calls) within one agent run
+AGENT_MAX_CONCURRENCY = int(os.getenv("AGENT_MAX_CONCURRENCY", "4"))
 
 if not OPENAI_API_KEY:
     raise RuntimeError("OPENAI_API_KEY is not set")
 
 
+# -----------------------------------------------------------------------------
+# Shared HTTP clients (connection pooling)
+# -----------------------------------------------------------------------------
+
+# One pooled client per mode, reused by every LLM call so each turn skips the
+# TCP + TLS handshake. HTTP/2 multiplexes concurrent completions on one socket.
+_HTTP_LIMITS = httpx.Limits(max_keepalive_connections=32)
+_HTTP_CLIENT = httpx.Client(limits=_HTTP_LIMITS, http2=True, timeout=60.0)
+_AHTTP_CLIENT = httpx.AsyncClient(limits=_HTTP_LIMITS, http2=True, timeout=60.0)
+
+atexit.register(_HTTP_CLIENT.close)
+
+
+async def awarm_connection() -> None:
+    """
+    Open a keep-alive connection to the LLM provider ahead of the first turn.
+
+    Sends a cheap `GET /models` through the shared async client so the first
+    user message does not pay the TCP + TLS + HTTP/2 handshake. Failures are
+    ignored; this only primes the connection pool.
+    """
+    try:
+        await _AHTTP_CLIENT.get(
+            f"{OPENAI_BASE_URL}/models",
+            headers={"Authorization": f"Bearer {OPENAI_API_KEY}"},
+            timeout=5.0,
+        )
+    except Exception:
+        pass
+
+
 # -----------------------------------------------------------------------------
 # Tool registration
 # -----------------------------------------------------------------------------
@@ -74,12 +115,15 @@ def build_tools() -> List[StructuredTool]:
     """
     Wrap pure Python functions as LangChain tools.
 
+    Read-only tools are memoized with `tool_cache`, so repeated calls with the
+    same arguments on the same dataset skip recomputation.
+
     Returns:
         list[StructuredTool]: Tools exposed to the agent.
     """
     return [
         StructuredTool.from_function(
-            func=dataset_summary,
+            func=tool_cache(dataset_summary),
             name="dataset_summary",
             description=dataset_summary.__doc__,
         ),
@@ -89,27 +133,27 @@ def build_tools() -> List[StructuredTool]:
             description=sample_rows.__doc__,
         ),
         StructuredTool.from_function(
-            func=find_columns,
+            func=tool_cache(find_columns),
             name="find_columns",
             description=find_columns.__doc__,
         ),
         StructuredTool.from_function(
-            func=describe_columns,
+            func=tool_cache(describe_columns),
             name="describe_columns",
             description=describe_columns.__doc__,
         ),
         StructuredTool.from_function(
-            func=missing_values,
+            func=tool_cache(missing_values),
             name="missing_values",
             description=missing_values.__doc__,
         ),
         StructuredTool.from_function(
-            func=value_counts,
+            func=tool_cache(value_counts),
             name="value_counts",
             description=value_counts.__doc__,
         ),
         StructuredTool.from_function(
-            func=correlation_matrix,
+            func=tool_cache(correlation_matrix),
             name="correlation_matrix",
             description=correlation_matrix.__doc__,
         ),
@@ -129,16 +173,18 @@ SYSTEM_PROMPT = """
 You are a data analysis assistant with access to tools for analyzing datasets.
 
 CRITICAL RULES:
-1. ALWAYS use the dataset_summary tool FIRST when a user asks ANY question about their data
+1. Call dataset_summary once per session if you don't already know the schema
+   (skip it when the loaded dataset schema is given in a system message)
 2. You MUST use tools to answer questions - you cannot answer from memory
 3. You do NOT write or execute Python code yourself
 4. When asked about columns, use find_columns tool
 5. When asked about statistics, use describe_columns or missing_values tools
 6. When asked to create visualizations, use the plot tool
-7. ALWAYS call tools to get information - never assume the dataset structure
+7. ALWAYS call tools to get data values and statistics; treat the schema given in a system
+   message as known structure, and never assume structure that is not given there
 
 Available tools:
-- dataset_summary: Get overview (shape, columns, types) - USE THIS FIRST
+- dataset_summary: Get overview (shape, columns, types)
 - sample_rows: View sample data rows
 - find_columns: Search for columns by keyword
 - describe_columns: Get statistical summaries
@@ -149,7 +195,7 @@ Available tools:
 
 Your workflow:
 1. User asks a question
-2. Call dataset_summary to understand the dataset
+2. Call dataset_summary only if the schema is not already known
 3. Use appropriate tools to gather the needed information
 4. Present findings clearly and concisely
 
@@ -190,6 +236,8 @@ def build_agent() -> AgentExecutor:
         base_url=OPENAI_BASE_URL,
         model=OPENROUTER_MODEL,
         temperature=0.0,  # deterministic, analytical behavior
+        http_client=_HTTP_CLIENT,
+        http_async_client=_AHTTP_CLIENT,
     )
 
     tools = build_tools()
@@ -206,7 +254,8 @@ def build_agent() -> AgentExecutor:
         tools=tools,
         verbose=True,  # Enable verbose mode for debugging
         handle_parsing_errors=True,
-        max_iterations=10,  # Increase from 5 to allow more tool calls
+        max_iterations=5,  # Bound tool cycles to cap tail latency
+        early_stopping_method="force",
         return_intermediate_steps=False,
     )
 
@@ -215,13 +264,32 @@ def build_agent() -> AgentExecutor:
 # Convenience entry point (used by Gradio)
 # -----------------------------------------------------------------------------
 
-def run_agent(
+def _schema_message() -> tuple[str, str] | None:
+    """
+    Build a system message describing the loaded dataset, if any.
+
+    The summary is precomputed on upload, so the model can start working
+    without spending a turn on a dataset_summary tool call.
+
+    Returns:
+        tuple[str, str] | None: ("system", text) message, or None if no dataset
+        is loaded.
+    """
+    if STATE.summary is None:
+        return None
+    return ("system", f"Loaded dataset schema: {json.dumps(STATE.summary, default=str)}")
+
+
+async def arun_agent(
     agent: AgentExecutor,
     user_input: str,
     chat_history: list | None = None,
 ) -> str:
     """
-    Run the agent on a single user message.
+    Run the agent on a single user message without blocking the event loop.
+
+    The schema of the loaded dataset, if any, is prepended to the chat history
+    as a system message.
 
     Args:
         agent (AgentExecutor): The agent instance.
@@ -233,11 +301,44 @@ def run_agent(
     """
     chat_history = chat_history or []
 
-    result = agent.invoke(
+    schema = _schema_message()
+    if schema is not None:
+        chat_history = [schema] + list(chat_history)
+
+    result = await agent.ainvoke(
         {
             "input": user_input,
             "chat_history": chat_history,
-        }
+        },
+        config=RunnableConfig(max_concurrency=AGENT_MAX_CONCURRENCY),
     )
 
-    return result["output"]
\ No newline at end of file
+    return result["output"]
+
+
+async def arun_agent_batch(
+    agent: AgentExecutor,
+    user_inputs: List[str],
+    concurrency: int = 8,
+) -> List[str]:
+    """
+    Run the agent on many independent user messages concurrently.
+
+    Intended for evaluation/offline workflows. Each message starts with an
+    empty chat history; at most `concurrency` runs are in flight at once.
+
+    Args:
+        agent (AgentExecutor): The agent instance.
+        user_inputs (list[str]): User messages to answer.
+        concurrency (int, optional): Maximum concurrent agent runs. Default: 8.
+
+    Returns:
+        list[str]: Agent responses, in the same order as `user_inputs`.
+    """
+    sem = asyncio.Semaphore(max(1, int(concurrency)))
+
+    async def one(user_input: str) -> str:
+        async with sem:
+            return await arun_agent(agent, user_input)
+
+    return await asyncio.gather(*[one(x) for x in user_inputs])
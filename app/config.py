@@ -22,10 +22,16 @@ from __future__ import annotations
 
 import os
 from dataclasses import dataclass
+import pandas as pd
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Copy-on-write avoids hidden copies and cross-tool mutation of shared frames.
+# It is always on from pandas 3.0, where the option is deprecated.
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
+
 
 @dataclass(frozen=True)
 class AppConfig:
@@ -60,6 +66,28 @@ correlation matrices, value counts, and visualizations (histograms, box plots, s
 
     # Limits
     MAX_UPLOAD_SIZE_MB: int = int(os.getenv("MAX_UPLOAD_SIZE_MB", "50"))
+    # CSVs larger than this are read lazily with Dask instead of pandas
+    LARGE_CSV_THRESHOLD_MB: int = int(os.getenv("LARGE_CSV_THRESHOLD_MB", "200"))
+    LARGE_CSV_SAMPLE_ROWS: int = int(os.getenv("LARGE_CSV_SAMPLE_ROWS", "100000"))
+    # Parsed uploads are cached here as Parquet, keyed on file content.
+    # The directory is created private (0700) and pruned by age and total size.
+    # "~" is expanded here because .env files and compose env_file do not.
+    UPLOAD_CACHE_DIR: str = os.path.expanduser(
+        os.getenv(
+            "UPLOAD_CACHE_DIR",
+            os.path.join(
+                os.getenv("XDG_CACHE_HOME", "~/.cache"),
+                "data-analysis-agent",
+                "uploads",
+            ),
+        )
+    )
+    UPLOAD_CACHE_MAX_MB: int = int(os.getenv("UPLOAD_CACHE_MAX_MB", "1024"))
+    UPLOAD_CACHE_MAX_AGE_HOURS: int = int(os.getenv("UPLOAD_CACHE_MAX_AGE_HOURS", "168"))
+
+    # Acceleration: compute large Pearson correlations on a CUDA GPU via CuPy
+    GPU_CORRELATION: bool = os.getenv("GPU_CORRELATION", "false").lower() == "true"
+    GPU_MIN_CELLS: int = int(os.getenv("GPU_MIN_CELLS", "5000000"))
 
     # Behavior
     RESET_CHAT_ON_UPLOAD: bool = True
@@ -21,13 +21,20 @@ Last Modified: January 2026
 
 from __future__ import annotations
 
+import numpy as np
 import pandas as pd
+import dask.dataframe as dd
 import gradio as gr
+import hashlib
 import os
 import re
+import stat
+import tempfile
+import time
 
-from app.state import STATE
-from app.agent import build_agent, run_agent
+from app.state import STATE, build_metadata
+from app.agent import build_agent, arun_agent, awarm_connection
+from app.tools.cache import tool_cache
 from app.config import CONFIG
 
 
@@ -38,10 +45,161 @@ from app.config import CONFIG
 AGENT = build_agent()
 
 
+# -----------------------------------------------------------------------------
+# Response parsing patterns (compiled once)
+# -----------------------------------------------------------------------------
+
+# Plot path, either direct (/tmp/plot_xxx.png) or prefixed (sandbox:/tmp/...)
+_PAT_PLOT = re.compile(r'(?:sandbox:)?(/tmp/plot_[a-f0-9]+\.png)')
+# Display cleanup: markdown image ![...](sandbox:/tmp/...) or bare sandbox path
+_PAT_CLEAN = re.compile(
+    r'!\[.*?\]\(sandbox:/tmp/.*?\)'
+    r'|sandbox:/tmp/plot_[a-f0-9]+\.png'
+)
+
+
 # -----------------------------------------------------------------------------
 # Helpers
 # -----------------------------------------------------------------------------
 
+def _upload_cache_dir() -> str | None:
+    """
+    Return the upload cache directory, creating it private to this user.
+
+    Returns None (caching disabled) if the directory cannot be created, or if
+    it is owned by another user or writable by group/others, since any file
+    planted there would be loaded as a user's dataset.
+    """
+    cache_dir = CONFIG.UPLOAD_CACHE_DIR
+    try:
+        os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+        st = os.stat(cache_dir)
+    except OSError:
+        return None
+    if hasattr(os, "getuid") and (
+        st.st_uid != os.getuid() or st.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+    ):
+        return None
+    return cache_dir
+
+
+def _prune_upload_cache(cache_dir: str) -> None:
+    """
+    Evict cached uploads older than the age limit, then the least recently
+    used ones until the cache fits within UPLOAD_CACHE_MAX_MB.
+    """
+    entries = []
+    for name in os.listdir(cache_dir):
+        if name.startswith("upload_") and name.endswith(".parquet"):
+            path = os.path.join(cache_dir, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+
+    cutoff = time.time() - CONFIG.UPLOAD_CACHE_MAX_AGE_HOURS * 3600
+    budget = CONFIG.UPLOAD_CACHE_MAX_MB * 1024 * 1024
+    total = 0
+    # Newest first: keep entries while they are fresh and fit the budget
+    for mtime, size, path in sorted(entries, reverse=True):
+        total += size
+        if mtime < cutoff or total > budget:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def _upload_cache_path(filepath: str, cache_dir: str) -> str:
+    """
+    Return the Parquet cache path for a CSV, keyed on its content hash.
+
+    The whole file is hashed so different files never share an entry; reading
+    bytes is far cheaper than parsing them as CSV.
+    """
+    h = hashlib.sha1()
+    with open(filepath, "rb") as f:
+        for chunk in iter(lambda: f.read(1_048_576), b""):
+            h.update(chunk)
+    h.update(str(os.path.getsize(filepath)).encode())
+    return os.path.join(cache_dir, f"upload_{h.hexdigest()}.parquet")
+
+
+def _downcast(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Shrink column dtypes so downstream tools move fewer bytes.
+
+    Integers are downcast to the smallest type that holds them, floats to
+    float32 only when every value survives the round-trip exactly, and
+    low-cardinality text columns become categoricals.
+    """
+    for c in df.select_dtypes(include="integer").columns:
+        df[c] = pd.to_numeric(df[c], downcast="integer")
+
+    for c in df.select_dtypes(include="floating").columns:
+        down = pd.to_numeric(df[c], downcast="float")
+        if down.dtype == df[c].dtype:
+            continue
+        orig = df[c].to_numpy(dtype=np.float64, na_value=np.nan)
+        back = down.to_numpy(dtype=np.float64, na_value=np.nan)
+        if np.array_equal(orig, back, equal_nan=True):
+            df[c] = down
+
+    if len(df):
+        for c in df.select_dtypes(include=["object", "string"]).columns:
+            if df[c].nunique() / len(df) < 0.5:
+                df[c] = df[c].astype("category")
+    return df
+
+
+def _read_csv(filepath: str) -> pd.DataFrame:
+    """
+    Parse a CSV into pandas, reusing a cached Parquet copy of earlier uploads.
+
+    The cached copy is stored after downcasting, so reloads keep compact dtypes.
+    A fresh parse also returns the Parquet round-trip, so first and repeat
+    uploads of the same file expose identical dtypes.
+    """
+    cache_dir = _upload_cache_dir()
+    cache_path = _upload_cache_path(filepath, cache_dir) if cache_dir else None
+    if cache_path and os.path.exists(cache_path):
+        try:
+            df = pd.read_parquet(cache_path)
+            os.utime(cache_path)  # mark as recently used for eviction
+            return df
+        except Exception:
+            pass  # unreadable cache entry: parse the CSV again
+
+    try:
+        # Multithreaded parse into Arrow-backed columns
+        df = pd.read_csv(filepath, engine="pyarrow", dtype_backend="pyarrow")
+    except (ImportError, ValueError):
+        # pyarrow missing or unsupported dialect: fall back to the C engine
+        df = pd.read_csv(filepath)
+    df = _downcast(df)
+
+    if cache_path is None:
+        return df
+
+    # Write under a unique temporary name, then rename atomically so a
+    # concurrent upload of the same file never sees a partial entry
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, prefix=".tmp_", suffix=".parquet")
+    os.close(fd)
+    try:
+        df.to_parquet(tmp_path, compression="zstd")
+        os.replace(tmp_path, cache_path)
+        cached = pd.read_parquet(cache_path)
+    except Exception:
+        return df  # caching is best-effort (e.g. mixed-type object columns)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    _prune_upload_cache(cache_dir)
+    return cached
+
+
 def load_csv(file):
     """
     Load a CSV file into the global application state.
@@ -58,23 +216,53 @@ def load_csv(file):
             filepath = file.name
         else:
             filepath = file
-        
-        df = pd.read_csv(filepath)
-        
+
+        size_mb = os.path.getsize(filepath) / (1024 * 1024)
+        if size_mb > CONFIG.LARGE_CSV_THRESHOLD_MB:
+            # Large file: read lazily in chunks, keep only a sampled head in memory.
+            # Dtypes are inferred from the first block; assume_missing reads
+            # integer columns as floats so NaNs in later blocks still parse.
+            ddf = dd.read_csv(filepath, blocksize="64MB", assume_missing=True)
+            df = ddf.head(CONFIG.LARGE_CSV_SAMPLE_ROWS)
+            # Full pass: counts rows and surfaces dtype mismatches in any block
+            rows = len(ddf)
+        else:
+            ddf = None
+            df = _read_csv(filepath)
+            rows = df.shape[0]
+
     except Exception as e:
         return f"Failed to read CSV: {e}", []
 
-    STATE.df = df
-    STATE.dataset_name = os.path.basename(filepath)
+    dataset_name = os.path.basename(filepath)
+    # Derive metadata before taking the lock so tool calls are never blocked
+    metadata = build_metadata(df, dataset_name, rows)
+
+    # Swap the dataset and its derived metadata atomically for concurrent users
+    with STATE.lock:
+        STATE.df = df
+        STATE.ddf = ddf
+        STATE.dataset_name = dataset_name
+        for key, value in metadata.items():
+            setattr(STATE, key, value)
+        tool_cache.clear()
+
+    if ddf is not None:
+        return (
+            f"Loaded large dataset '{dataset_name}' "
+            f"with {rows} rows and {df.shape[1]} columns in {ddf.npartitions} chunks "
+            f"(previewing the first {df.shape[0]} rows).",
+            [],
+        )
 
     return (
-        f"Loaded dataset '{STATE.dataset_name}' "
+        f"Loaded dataset '{dataset_name}' "
         f"with {df.shape[0]} rows and {df.shape[1]} columns.",
         [],
     )
 
 
-def chat_handler(message: str, chat_history: list):
+async def chat_handler(message: str, chat_history: list):
     """
     Handle a single chat turn.
 
@@ -102,7 +290,7 @@ def chat_handler(message: str, chat_history: list):
                 langchain_history.append(("ai", item[1]))
 
     try:
-        response = run_agent(
+        response = await arun_agent(
             agent=AGENT,
             user_input=message,
             chat_history=langchain_history,
@@ -115,29 +303,14 @@ def chat_handler(message: str, chat_history: list):
     display_response = response
     
     # Check if response contains a file path (either direct or in markdown)
-    # Pattern 1: Direct path like /tmp/plot_xxx.png
-    # Pattern 2: Markdown image like ![...](...) or sandbox:/tmp/...
-    path_patterns = [
-        r'/tmp/plot_[a-f0-9]+\.png',
-        r'sandbox:(/tmp/plot_[a-f0-9]+\.png)',
-    ]
-    
-    for pattern in path_patterns:
-        matches = re.findall(pattern, response)
-        if matches:
-            # Get the actual path (handle capture groups)
-            plot_path = matches[0] if not isinstance(matches[0], tuple) else matches[0]
-            # Remove sandbox: prefix if present
-            plot_path = plot_path.replace('sandbox:', '')
-            
-            # Clean up the response - remove the image markdown
-            display_response = re.sub(r'!\[.*?\]\(sandbox:/tmp/.*?\)', '', response)
-            display_response = re.sub(r'sandbox:/tmp/plot_[a-f0-9]+\.png', '', display_response)
-            display_response = display_response.strip()
-            
-            if not display_response:
-                display_response = "I generated a plot for you. See below."
-            break
+    match = _PAT_PLOT.search(response)
+    if match:
+        plot_path = match.group(1)
+
+        # Clean up the response - remove the image markdown
+        display_response = _PAT_CLEAN.sub('', response).strip()
+        if not display_response:
+            display_response = "I generated a plot for you. See below."
 
     # Return in new Gradio messages format (dict with role/content)
     updated_history = chat_history + [
@@ -187,6 +360,13 @@ with gr.Blocks(title=CONFIG.APP_TITLE) as demo:
 
     # ---- Events ----
 
+    # Prime the LLM connection pool on Gradio's event loop when the page opens
+    demo.load(
+        fn=awarm_connection,
+        inputs=None,
+        outputs=None,
+    )
+
     file_upload.upload(
         fn=load_csv,
         inputs=file_upload,
@@ -16,11 +16,93 @@ License:
 Created: January 2026
 Last Modified: January 2026
 """
+import threading
+from dataclasses import dataclass
+import numpy as np
 import pandas as pd
-from typing import Optional
+from typing import Any, Dict, List, Optional
+
+
+def build_metadata(
+    df: pd.DataFrame,
+    dataset_name: Optional[str],
+    rows: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Compute the derived metadata fields of AppState for a DataFrame.
+
+    Pure function: callers build the metadata first and then assign it to
+    STATE together with the DataFrame, so the lock is never held while the
+    dataset is being scanned.
+
+    Args:
+        df (pd.DataFrame): The (possibly sampled) DataFrame.
+        dataset_name (str | None): Name shown in the summary.
+        rows (int | None, optional): Row count of the full dataset.
+            Default: None (len(df)).
+
+    Returns:
+        dict: Values for summary, numeric_columns, columns_arr, columns_lower.
+    """
+    return {
+        "summary": {
+            "rows": int(df.shape[0] if rows is None else rows),
+            "columns": int(df.shape[1]),
+            "column_names": list(df.columns),
+            "dtypes": {col: str(dtype) for col, dtype in df.dtypes.items()},
+            "dataset_name": dataset_name,
+        },
+        "numeric_columns": df.select_dtypes(include="number").columns.tolist(),
+        "columns_arr": np.array(df.columns, dtype=object),
+        "columns_lower": np.array([str(c).lower() for c in df.columns], dtype=str),
+    }
+
+
+@dataclass(frozen=True)
+class Dataset:
+    """
+    Consistent, read-only view of the active dataset and its metadata.
+
+    Tools take one snapshot per call and read every field from it, so an
+    upload landing mid-call can never mix two datasets.
+    """
+    df: Optional[pd.DataFrame]
+    ddf: Optional[Any]
+    dataset_name: Optional[str]
+    summary: Optional[Dict[str, Any]]
+    numeric_columns: Optional[List[str]]
+    columns_arr: Optional[np.ndarray]
+    columns_lower: Optional[np.ndarray]
+
 
 class AppState:
+    # Held while swapping or reading the active dataset
+    lock = threading.RLock()
     df: Optional[pd.DataFrame] = None
+    # dask.dataframe.DataFrame for large uploads; df then holds a sampled head
+    ddf: Optional[Any] = None
     dataset_name: Optional[str] = None
+    # Derived metadata, computed once per upload
+    summary: Optional[Dict[str, Any]] = None
+    numeric_columns: Optional[List[str]] = None
+    # Column names as arrays for vectorized lookups in find_columns
+    columns_arr: Optional[np.ndarray] = None
+    columns_lower: Optional[np.ndarray] = None
+
+    def snapshot(self) -> Dataset:
+        """
+        Return every dataset field, read together under the lock.
+        """
+        with self.lock:
+            return Dataset(
+                df=self.df,
+                ddf=self.ddf,
+                dataset_name=self.dataset_name,
+                summary=self.summary,
+                numeric_columns=self.numeric_columns,
+                columns_arr=self.columns_arr,
+                columns_lower=self.columns_lower,
+            )
+
 
 STATE = AppState()
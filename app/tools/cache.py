@@ -0,0 +1,81 @@
+# app/tools/cache.py
+"""
+Data Analysis Agent - AI-Powered CSV Data Explorer
+Copyright (c) 2026 Mohammed Shehab. All rights reserved.
+
+Author: Mohammed Shehab
+Email: shihab@live.cn
+GitHub: https://github.com/M12Shehab/DataAnalysisAgent
+LinkedIn: https://linkedin.com/in/mohammed-shehab
+
+Description:
+    Result cache for tool functions of the Data Analysis Agent.
+    The agent often repeats the same tool call with the same arguments
+    across turns; cached results are returned without touching the DataFrame.
+
+License:
+    MIT License - see LICENSE file for details
+
+Created: January 2026
+Last Modified: January 2026
+"""
+from __future__ import annotations
+
+import functools
+import pickle
+import threading
+from collections import OrderedDict
+from typing import Any, Callable
+
+from app.state import STATE
+
+MAX_CACHE_ENTRIES = 128
+
+
+class ToolCache:
+    """
+    LRU cache for tool results keyed on (tool name, arguments, active dataset).
+
+    Use an instance as a decorator. Call `clear()` whenever a new dataset is
+    loaded so results from the previous dataset are never returned.
+    """
+
+    def __init__(self, maxsize: int = MAX_CACHE_ENTRIES) -> None:
+        self.maxsize = maxsize
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __call__(self, fn: Callable[..., Any]) -> Callable[..., Any]:
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            df_id = id(STATE.df)
+            key = (
+                fn.__name__,
+                pickle.dumps((args, sorted(kwargs.items())), protocol=5),
+                df_id,
+            )
+            with self._lock:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    return self._entries[key]
+
+            result = fn(*args, **kwargs)
+
+            with self._lock:
+                if id(STATE.df) != df_id:
+                    # A new upload landed mid-call; the result may mix datasets
+                    return result
+                self._entries[key] = result
+                if len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+            return result
+
+        return wrapper
+
+    def clear(self) -> None:
+        """Drop all cached results."""
+        with self._lock:
+            self._entries.clear()
+
+
+tool_cache = ToolCache()
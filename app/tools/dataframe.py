@@ -21,20 +21,24 @@ Last Modified: January 2026
 from __future__ import annotations
 
 from typing import Any, Dict, List
-import pandas as pd
-from app.state import STATE
+import numpy as np
+from app.state import STATE, Dataset
 
 
-def _require_df() -> pd.DataFrame:
+def _require_dataset() -> Dataset:
     """
-    Internal helper: return the active DataFrame or raise a clear error.
+    Internal helper: return a consistent snapshot of the active dataset.
+
+    Read every field from the returned snapshot, never from STATE directly,
+    so a concurrent upload cannot mix two datasets within one call.
 
     Raises:
         ValueError: If no dataset is loaded in STATE.df.
     """
-    if STATE.df is None:
+    ds = STATE.snapshot()
+    if ds.df is None:
         raise ValueError("No dataset loaded. Upload a CSV first.")
-    return STATE.df
+    return ds
 
 
 def dataset_summary() -> Dict[str, Any]:
@@ -72,14 +76,7 @@ def dataset_summary() -> Dict[str, Any]:
           "dataset_name": "titanic.csv"
         }
     """
-    df = _require_df()
-    return {
-        "rows": int(df.shape[0]),
-        "columns": int(df.shape[1]),
-        "column_names": list(df.columns),
-        "dtypes": {col: str(dtype) for col, dtype in df.dtypes.items()},
-        "dataset_name": STATE.dataset_name,
-    }
+    return _require_dataset().summary
 
 
 def sample_rows(n: int = 5) -> List[Dict[str, Any]]:
@@ -113,7 +110,7 @@ def sample_rows(n: int = 5) -> List[Dict[str, Any]]:
           {"age": 38, "fare": 71.28, "sex": "female"}
         ]
     """
-    df = _require_df()
+    df = _require_dataset().df
     n = int(n)
     n = max(1, min(n, 20))
     return df.head(n).to_dict(orient="records")
@@ -140,8 +137,9 @@ def find_columns(keyword: str) -> List[str]:
         >>> find_columns("date")
         ["created_date", "signup_date"]
     """
-    df = _require_df()
+    ds = _require_dataset()
     kw = (keyword or "").strip().lower()
     if not kw:
         return []
-    return [c for c in df.columns if kw in c.lower()]
+    mask = np.char.find(ds.columns_lower, kw) >= 0
+    return ds.columns_arr[mask].tolist()
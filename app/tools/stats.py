@@ -20,20 +20,170 @@ Last Modified: January 2026
 from __future__ import annotations
 
 from typing import Any, Dict, List, Optional
+import warnings
+import numpy as np
 import pandas as pd
-from app.state import STATE
+from numba import njit
+from app.config import CONFIG
+from app.state import STATE, Dataset
 
+try:  # optional: GPU correlation for CUDA deployments
+    import cupy
+except ImportError:
+    cupy = None
 
-def _require_df() -> pd.DataFrame:
+
+def _require_dataset() -> Dataset:
     """
-    Internal helper: return the active DataFrame or raise a clear error.
+    Internal helper: return a consistent snapshot of the active dataset.
+
+    Read every field from the returned snapshot, never from STATE directly,
+    so a concurrent upload cannot mix two datasets within one call.
 
     Raises:
         ValueError: If no dataset is loaded in STATE.df.
     """
-    if STATE.df is None:
+    ds = STATE.snapshot()
+    if ds.df is None:
         raise ValueError("No dataset loaded. Upload a CSV first.")
-    return STATE.df
+    return ds
+
+
+@njit(cache=True)
+def _na_counts(arr: np.ndarray) -> np.ndarray:
+    """
+    Internal helper: count NaNs per column of a 2D float array in one pass.
+
+    Compiled once and cached on disk. Deliberately single-threaded: tools run
+    in concurrent executor threads, which Numba's parallel threading layers
+    do not support safely, and the scan is memory-bound anyway.
+    """
+    out = np.zeros(arr.shape[1], np.int64)
+    for j in range(arr.shape[1]):
+        s = 0
+        for i in range(arr.shape[0]):
+            if np.isnan(arr[i, j]):
+                s += 1
+        out[j] = s
+    return out
+
+
+def _gpu_available() -> bool:
+    """
+    Internal helper: True if GPU correlation is enabled and a CUDA device exists.
+    """
+    if not CONFIG.GPU_CORRELATION or cupy is None:
+        return False
+    try:
+        return cupy.cuda.runtime.getDeviceCount() > 0
+    except Exception:
+        return False
+
+
+def _pearson_corr_gpu(num_df: pd.DataFrame) -> Optional[pd.DataFrame]:
+    """
+    Internal helper: Pearson correlation with `cupy.corrcoef` on the GPU.
+
+    `corrcoef` has no pairwise NaN handling, so frames with missing values
+    return None and the caller falls back to the CPU path.
+    """
+    X = num_df.to_numpy(dtype=np.float32, na_value=np.nan)
+    if np.isnan(X).any():
+        return None
+    corr = cupy.asnumpy(cupy.corrcoef(cupy.asarray(X), rowvar=False))
+    return pd.DataFrame(corr.astype(np.float64), index=num_df.columns, columns=num_df.columns)
+
+
+def _pearson_corr(num_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Internal helper: pairwise-complete Pearson correlation via matrix products.
+
+    Matches `DataFrame.corr(method="pearson")` but computes every pair at once
+    with BLAS matmuls instead of a per-pair loop. Missing values are zeroed and
+    tracked by a mask so each pair only uses rows where both values exist.
+    """
+    X = num_df.to_numpy(dtype=np.float64, na_value=np.nan, copy=True)
+    mask = ~np.isnan(X)
+    M = mask.astype(np.float64)
+    X[~mask] = 0.0
+    # Center for numerical stability; correlation is shift-invariant
+    X -= X.sum(axis=0) / np.maximum(mask.sum(axis=0), 1)
+    X[~mask] = 0.0
+
+    n = M.T @ M                  # rows where both columns are present
+    sx = X.T @ M                 # sum of column i over those rows
+    sxx = (X * X).T @ M          # sum of squares of column i over those rows
+    sxy = X.T @ X                # cross products (zeros drop missing rows)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cov = sxy - sx * sx.T / n
+        var_x = sxx - sx * sx / n
+        var_y = var_x.T
+        C = cov / np.sqrt(var_x * var_y)
+    C[(n < 2) | (var_x <= 0) | (var_y <= 0)] = np.nan
+    C = np.clip(C, -1.0, 1.0)
+    diag = np.diag(C).copy()
+    diag[~np.isnan(diag)] = 1.0
+    np.fill_diagonal(C, diag)
+    return pd.DataFrame(C, index=num_df.columns, columns=num_df.columns)
+
+
+def _is_plain_numeric(dtype: Any) -> bool:
+    """
+    Internal helper: True for dtypes `describe` summarizes numerically.
+
+    Booleans are excluded because pandas describes them like categoricals.
+    """
+    return pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)
+
+
+def _describe_numeric(df: pd.DataFrame) -> Dict[str, Dict[str, Any]]:
+    """
+    Internal helper: `describe()` for an all-numeric DataFrame in NumPy.
+
+    Computes every statistic for all columns at once over a single float64
+    ndarray. Output matches `describe(include="all").fillna("").to_dict()`.
+    """
+    arr = df.to_numpy(dtype=np.float64, na_value=np.nan)
+    with warnings.catch_warnings():
+        # All-NaN columns yield NaN statistics, as pandas does
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        q = np.nanpercentile(arr, [25, 50, 75], axis=0)
+        stats = {
+            "count": (~np.isnan(arr)).sum(axis=0).astype(np.float64),
+            "mean": np.nanmean(arr, axis=0),
+            "std": np.nanstd(arr, axis=0, ddof=1),
+            "min": np.nanmin(arr, axis=0),
+            "25%": q[0],
+            "50%": q[1],
+            "75%": q[2],
+            "max": np.nanmax(arr, axis=0),
+        }
+
+    return {
+        col: {
+            name: "" if np.isnan(values[j]) else float(values[j])
+            for name, values in stats.items()
+        }
+        for j, col in enumerate(df.columns)
+    }
+
+
+def _categorical_counts(series: pd.Series) -> pd.Series:
+    """
+    Internal helper: `value_counts(dropna=False, sort=False)` for a categorical.
+
+    Counts the integer category codes with `np.bincount`; missing values
+    (code -1) are counted separately and only included when present.
+    """
+    codes = series.cat.codes.to_numpy()
+    present = codes >= 0
+    counts = np.bincount(codes[present], minlength=len(series.cat.categories))
+    vc = pd.Series(counts, index=series.cat.categories)
+    n_missing = int((~present).sum())
+    if n_missing:
+        vc = pd.concat([vc, pd.Series([n_missing], index=[np.nan])])
+    return vc
 
 
 def describe_columns(columns: Optional[List[str]] = None) -> Dict[str, Any]:
@@ -75,7 +225,9 @@ def describe_columns(columns: Optional[List[str]] = None) -> Dict[str, Any]:
           "fare": {"count": 891.0, "mean": 32.2, ...}
         }
     """
-    df = _require_df()
+    ds = _require_dataset()
+    # Large uploads run on the lazy Dask frame; results need .compute()
+    df = ds.ddf if ds.ddf is not None else ds.df
 
     if columns is not None:
         missing = [c for c in columns if c not in df.columns]
@@ -83,9 +235,21 @@ def describe_columns(columns: Optional[List[str]] = None) -> Dict[str, Any]:
             raise ValueError(f"Invalid columns: {missing}")
         df = df[columns]
 
+    # Fast path: all-numeric selection on an in-memory frame
+    if (
+        ds.ddf is None
+        and df.shape[0] > 0
+        and df.shape[1] > 0
+        and all(_is_plain_numeric(t) for t in df.dtypes)
+    ):
+        return _describe_numeric(df)
+
     desc = df.describe(include="all")
-    # Make JSON-safe: NaN -> "" (or you could choose None)
-    desc = desc.fillna("")
+    if ds.ddf is not None:
+        desc = desc.compute()
+    # Make JSON-safe: NaN -> "" (or you could choose None). Cast first so
+    # Arrow-backed numeric columns accept the string fill value.
+    desc = desc.astype(object).fillna("")
     return desc.to_dict()
 
 
@@ -106,8 +270,23 @@ def missing_values() -> Dict[str, int]:
         >>> missing_values()
         {"age": 177, "cabin": 687, "fare": 0}
     """
-    df = _require_df()
-    return {col: int(df[col].isna().sum()) for col in df.columns}
+    ds = _require_dataset()
+    if ds.ddf is not None:
+        counts = ds.ddf.isna().sum().compute()
+        return {col: int(n) for col, n in counts.items()}
+
+    # Numeric columns: single compiled pass over the raw ndarray
+    df = ds.df
+    num_cols = df.select_dtypes(include="number").columns
+    counts = {}
+    if len(num_cols):
+        arr = df[num_cols].to_numpy(dtype=np.float64, na_value=np.nan)
+        counts = dict(zip(num_cols, _na_counts(arr).tolist()))
+
+    return {
+        col: counts[col] if col in counts else int(df[col].isna().sum())
+        for col in df.columns
+    }
 
 
 def value_counts(column: str, limit: int = 10) -> Dict[str, int]:
@@ -117,6 +296,9 @@ def value_counts(column: str, limit: int = 10) -> Dict[str, int]:
     Best for categorical/text columns. For numeric columns, it can still work
     but may have too many unique values.
 
+    For very large datasets (loaded in chunks), counts cover only the first
+    sampled rows, not the whole file; report them as sample counts.
+
     Args:
         column (str): Column name to count values for.
         limit (int, optional): Maximum number of most frequent values to return.
@@ -137,14 +319,19 @@ def value_counts(column: str, limit: int = 10) -> Dict[str, int]:
         >>> value_counts("sex", limit=2)
         {"male": 577, "female": 314}
     """
-    df = _require_df()
+    df = _require_dataset().df
     if column not in df.columns:
         raise ValueError(f"Column '{column}' does not exist")
 
     limit = int(limit)
     limit = max(1, min(limit, 20))
 
-    vc = df[column].value_counts(dropna=False).head(limit)
+    # Partial top-k selection instead of sorting every unique value
+    series = df[column]
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        vc = _categorical_counts(series).nlargest(limit)
+    else:
+        vc = series.value_counts(dropna=False, sort=False).nlargest(limit)
     return {str(k): int(v) for k, v in vc.items()}
 
 
@@ -174,20 +361,38 @@ def correlation_matrix(method: str = "pearson") -> Dict[str, Dict[str, float]]:
     Notes:
         - Correlation uses pairwise complete observations (pandas default).
         - For very large datasets, this may be slower.
+        - Large (chunked) uploads compute Pearson over the full file; Spearman
+          and Kendall fall back to the sampled head.
+        - With GPU_CORRELATION enabled, large NaN-free Pearson inputs run on
+          the GPU (CuPy).
 
     Example:
         >>> correlation_matrix()
         {"age": {"age": 1.0, "fare": 0.09}, "fare": {"age": 0.09, "fare": 1.0}}
     """
-    df = _require_df()
+    ds = _require_dataset()
+    df = ds.df
 
     method = (method or "pearson").strip().lower()
     if method not in {"pearson", "spearman", "kendall"}:
         raise ValueError("method must be one of: pearson, spearman, kendall")
 
-    num_df = df.select_dtypes(include="number")
-    if num_df.shape[1] < 2:
+    numeric_columns = ds.numeric_columns
+    if len(numeric_columns) < 2:
         raise ValueError("Not enough numeric columns for correlation (need at least 2).")
 
+    if ds.ddf is not None and method == "pearson":
+        # Dask only implements Pearson; it streams over every chunk
+        corr = ds.ddf[numeric_columns].corr().compute().round(4)
+        return corr.to_dict()
+
+    num_df = df[numeric_columns]
+    if method == "pearson":
+        if num_df.size > CONFIG.GPU_MIN_CELLS and _gpu_available():
+            corr = _pearson_corr_gpu(num_df)
+            if corr is not None:
+                return corr.round(4).to_dict()
+        return _pearson_corr(num_df).round(4).to_dict()
+
     corr = num_df.corr(method=method).round(4)
     return corr.to_dict()
@@ -22,26 +22,41 @@ Last Modified: January 2026
 from __future__ import annotations
 
 from typing import Optional
+import threading
 import uuid
-import pandas as pd
+import numpy as np
+import matplotlib
+
+matplotlib.use("Agg")  # headless rendering; never initialize a GUI backend
+
 import matplotlib.pyplot as plt
 import seaborn as sns
-from app.state import STATE
+from app.state import STATE, Dataset
 
 ALLOWED_PLOTS = {"hist", "box", "scatter", "bar"}
 MAX_CATEGORIES_BAR = 10
+HIST_BINS = 30
+MAX_SCATTER_POINTS = 20_000
+
+# Single reused figure; cleared between plots and guarded by a lock
+_FIG, _AX = plt.subplots(figsize=(6, 4))
+_PLOT_LOCK = threading.Lock()
 
 
-def _require_df() -> pd.DataFrame:
+def _require_dataset() -> Dataset:
     """
-    Internal helper: return the active DataFrame or raise a clear error.
+    Internal helper: return a consistent snapshot of the active dataset.
+
+    Read every field from the returned snapshot, never from STATE directly,
+    so a concurrent upload cannot mix two datasets within one call.
 
     Raises:
         ValueError: If no dataset is loaded in STATE.df.
     """
-    if STATE.df is None:
+    ds = STATE.snapshot()
+    if ds.df is None:
         raise ValueError("No dataset loaded. Upload a CSV first.")
-    return STATE.df
+    return ds
 
 
 def plot(kind: str, column_x: str, column_y: Optional[str] = None) -> str:
@@ -75,6 +90,9 @@ def plot(kind: str, column_x: str, column_y: Optional[str] = None) -> str:
     Behavior / Constraints:
         - Output is always a PNG.
         - For "bar", only the top 10 categories are plotted.
+        - For "scatter", at most 20,000 randomly sampled points are plotted.
+        - For very large datasets (loaded in chunks), only the first sampled
+          rows are plotted, not the whole file; describe the plot accordingly.
         - The function does NOT return raw image bytes, only the file path.
         - Caller (Gradio) should load/display the returned file.
 
@@ -85,7 +103,7 @@ def plot(kind: str, column_x: str, column_y: Optional[str] = None) -> str:
         >>> plot("scatter", "height", "weight")
         "/tmp/plot_1a7b...png"
     """
-    df = _require_df()
+    df = _require_dataset().df
 
     kind = (kind or "").strip().lower()
     if kind not in ALLOWED_PLOTS:
@@ -100,26 +118,40 @@ def plot(kind: str, column_x: str, column_y: Optional[str] = None) -> str:
         if column_y not in df.columns:
             raise ValueError(f"Column '{column_y}' does not exist")
 
-    plt.figure(figsize=(6, 4))
-
-    if kind == "hist":
-        series = df[column_x].dropna()
-        series.hist(bins=30)
-
-    elif kind == "box":
-        sns.boxplot(x=df[column_x])
-
-    elif kind == "scatter":
-        sns.scatterplot(x=df[column_x], y=df[column_y])
-
-    elif kind == "bar":
-        vc = df[column_x].value_counts(dropna=False).head(MAX_CATEGORIES_BAR)
-        sns.barplot(x=vc.index.astype(str), y=vc.values)
-        plt.xticks(rotation=45, ha="right")
+    filename = f"/tmp/plot_{uuid.uuid4().hex}.png"
 
-    plt.tight_layout()
+    with _PLOT_LOCK:
+        _AX.clear()
+
+        if kind == "hist":
+            # Bin in NumPy and draw the bars directly
+            values = df[column_x].dropna().to_numpy(dtype=np.float64)
+            counts, edges = np.histogram(values, bins=HIST_BINS)
+            _AX.bar(edges[:-1], counts, width=np.diff(edges), align="edge")
+            _AX.grid(True)
+
+        elif kind == "box":
+            sns.boxplot(x=df[column_x], ax=_AX)
+
+        elif kind == "scatter":
+            n = len(df)
+            idx = np.random.default_rng(0).choice(
+                n, size=min(n, MAX_SCATTER_POINTS), replace=False
+            )
+            sns.scatterplot(
+                x=df[column_x].iloc[idx],
+                y=df[column_y].iloc[idx],
+                ax=_AX,
+                s=8,
+                alpha=0.5,
+            )
+
+        elif kind == "bar":
+            vc = df[column_x].value_counts(dropna=False).head(MAX_CATEGORIES_BAR)
+            sns.barplot(x=vc.index.astype(str), y=vc.values, ax=_AX)
+            plt.setp(_AX.get_xticklabels(), rotation=45, ha="right")
+
+        _FIG.tight_layout()
+        _FIG.savefig(filename, dpi=90)
 
-    filename = f"/tmp/plot_{uuid.uuid4().hex}.png"
-    plt.savefig(filename)
-    plt.close()
     return filename